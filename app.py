@@ -1,10 +1,36 @@
+import hashlib
+import itertools
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 import requests
+from requests.adapters import HTTPAdapter, Retry
 import plotly.express as px
+from plotly.colors import sample_colorscale
 from datetime import datetime, timedelta
 
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+try:
+    import orjson  # 2-3x faster decode of the sparkline-heavy API payload
+except ImportError:
+    orjson = None
+
+def _json_loads(raw):
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+def _json_dumps(data):
+    return orjson.dumps(data) if orjson is not None else json.dumps(data).encode()
+
 # Page Configuration
 st.set_page_config(page_title="Crypto Market Analysis", layout="wide")
 
@@ -15,6 +41,91 @@ This dashboard implements the project logic: classifying coins by market cap and
 """)
 
 # --- 1. Data Collection Module ---
+PER_PAGE = 50     # Coins per API page
+N_PAGES = 1       # Bump to analyze the top N_PAGES * PER_PAGE coins
+SPARK_WIDTH = 168 # Hourly points in a 7-day sparkline
+
+def _prices_buffer():
+    """Returns a session-scoped (MAX_N, 168) float32 buffer for sparklines.
+
+    Parking the array in st.session_state means refreshes refill it in place
+    instead of allocating a fresh one every time.
+    """
+    if 'prices_buf' not in st.session_state:
+        st.session_state.prices_buf = np.empty((PER_PAGE * N_PAGES, SPARK_WIDTH),
+                                               dtype=np.float32)
+    return st.session_state.prices_buf
+
+# Market-cap buckets: < 1B -> Small, 1B-10B -> Mid, >= 10B -> Large
+CAP_BINS = np.array([1e9, 10e9])
+CAP_LABELS = ['Small-Cap', 'Mid-Cap', 'Large-Cap']
+
+# Fused per-coin kernel: one streaming pass over the sparkline array computes
+# volatility, liquidity and the category code together, instead of separate
+# std/mean/divide/classify passes each re-reading the data.
+if HAVE_NUMBA:
+    @njit(parallel=True)
+    def _process_coins(prices, lengths, mcap, vol24, out_vol, out_liq, out_cat):
+        n = prices.shape[0]
+        for i in prange(n):
+            # Welford mean/variance over the valid prefix of the row; sparkline
+            # lengths vary (167/169 is common), so padding must stay out of the stats
+            width = lengths[i]
+            mean = 0.0
+            m2 = 0.0
+            for j in range(width):
+                delta = prices[i, j] - mean
+                mean += delta / (j + 1)
+                m2 += delta * (prices[i, j] - mean)
+            if width > 0 and mean != 0:
+                out_vol[i] = (m2 / width) ** 0.5 / mean
+            else:
+                out_vol[i] = 0.0
+            out_liq[i] = vol24[i] / mcap[i] if mcap[i] != 0 else 0.0
+            out_cat[i] = 2 if mcap[i] >= 10e9 else (1 if mcap[i] >= 1e9 else 0)
+else:
+    def _process_coins(prices, lengths, mcap, vol24, out_vol, out_liq, out_cat):
+        # Rows are NaN-padded past their sparkline length; nanmean/nanstd
+        # restrict the statistics to the real samples
+        valid = lengths > 0
+        mean = np.zeros(len(lengths), dtype=np.float32)
+        std = np.zeros(len(lengths), dtype=np.float32)
+        mean[valid] = np.nanmean(prices[valid], axis=1)
+        std[valid] = np.nanstd(prices[valid], axis=1)
+        np.divide(std, mean, out=out_vol, where=mean != 0)
+        np.divide(vol24, mcap, out=out_liq, where=mcap != 0)
+        out_cat[:] = np.searchsorted(CAP_BINS, mcap, side='right')
+
+# Persistent disk cache for the CoinGecko response. @st.cache_data only lives
+# as long as the process, so a cold container would re-pay the HTTPS round trip;
+# this keeps the raw payload on disk, keyed by (params, hour bucket).
+CACHE_DIR = Path('.cache')
+
+# Shared session with connection pooling: keep-alive saves a TLS handshake on
+# every cache-miss refresh, and the retry policy absorbs transient rate limits.
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8,
+                                      max_retries=Retry(total=2, backoff_factor=0.2)))
+
+def _cache_key(params):
+    bucket = int(time.time() // 3600)  # refetch at most once per hour
+    raw = json.dumps(params, sort_keys=True) + str(bucket)
+    return hashlib.blake2b(raw.encode()).hexdigest()
+
+def _cache_get(params):
+    path = CACHE_DIR / (_cache_key(params) + '.json')
+    try:
+        return _json_loads(path.read_bytes())
+    except (OSError, ValueError):
+        return None
+
+def _cache_set(params, data):
+    try:
+        CACHE_DIR.mkdir(exist_ok=True)
+        (CACHE_DIR / (_cache_key(params) + '.json')).write_bytes(_json_dumps(data))
+    except OSError:
+        pass  # caching is best-effort
+
 @st.cache_data
 def fetch_crypto_data():
     """
@@ -25,87 +136,201 @@ def fetch_crypto_data():
     params = {
         'vs_currency': 'usd',
         'order': 'market_cap_desc',
-        'per_page': 50,  # Analyze top 50 coins
-        'page': 1,
+        'per_page': PER_PAGE,
         'sparkline': 'true',
         'price_change_percentage': '24h,7d'
     }
-    
-    try:
-        response = requests.get(url, params=params, timeout=10)
+
+    def fetch_page(page):
+        response = SESSION.get(url, params={**params, 'page': page}, timeout=10)
         response.raise_for_status()
-        data = response.json()
+        return _json_loads(response.content)
+
+    try:
+        cache_params = {**params, 'pages': N_PAGES}
+        data = _cache_get(cache_params)
+        if data is None:
+            # Fetch all pages in parallel so latency stays ~1 RTT instead of N
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                pages = list(executor.map(fetch_page, range(1, N_PAGES + 1)))
+            data = list(itertools.chain.from_iterable(pages))
+            _cache_set(cache_params, data)
         
-        # Process API Data
-        processed_data = []
-        for coin in data:
-            # Calculate a simple volatility metric (std dev of last 7 days prices if sparkline exists)
-            prices = coin.get('sparkline_in_7d', {}).get('price', [])
-            volatility = np.std(prices) / np.mean(prices) if prices else 0
-            
-            processed_data.append({
-                'name': coin['name'],
-                'symbol': coin['symbol'].upper(),
-                'current_price': coin['current_price'],
-                'market_cap': coin['market_cap'],
-                'volume_24h': coin['total_volume'],
-                'change_7d': coin['price_change_percentage_7d_in_currency'],
-                'volatility': volatility, # Normalized volatility index
-                'liquidity_ratio': coin['total_volume'] / coin['market_cap'] if coin['market_cap'] else 0
-            })
-            
+        # Process API Data (vectorized: one 2D price array instead of per-coin loops)
+        names = [coin['name'] for coin in data]
+        symbols = [coin['symbol'].upper() for coin in data]
+        # float32/int64 keep the frame compact (halves the bytes scanned by corr/mean/sum)
+        current_price = np.array([coin['current_price'] for coin in data], dtype=np.float32)
+        market_cap = np.array([coin['market_cap'] for coin in data], dtype=np.int64)
+        volume_24h = np.array([coin['total_volume'] for coin in data], dtype=np.int64)
+        change_7d = np.array([coin['price_change_percentage_7d_in_currency'] or 0.0 for coin in data],
+                             dtype=np.float32)
+
+        # Fill the session-scoped sparkline buffer in place and run the fused
+        # kernel: volatility, liquidity and category codes in one pass
+        prices = _prices_buffer()[:len(data)]
+        prices.fill(np.nan)  # NaN padding so short sparklines don't skew the stats
+        lengths = np.zeros(len(data), dtype=np.int64)
+        for i, coin in enumerate(data):
+            row = coin.get('sparkline_in_7d', {}).get('price', [])
+            lengths[i] = min(len(row), SPARK_WIDTH)
+            prices[i, :lengths[i]] = row[:lengths[i]]
+        volatility = np.zeros(len(data), dtype=np.float32)
+        liquidity = np.zeros(len(data), dtype=np.float32)
+        cat_codes = np.zeros(len(data), dtype=np.int8)
+        _process_coins(prices, lengths, market_cap, volume_24h, volatility, liquidity, cat_codes)
+
         st.success("Successfully fetched live data from CoinGecko.")
-        return pd.DataFrame(processed_data)
+        return pd.DataFrame({
+            'name': names,
+            'symbol': symbols,
+            'current_price': current_price,
+            'market_cap': market_cap,
+            'volume_24h': volume_24h,
+            'change_7d': change_7d,
+            'volatility': volatility, # Normalized volatility index
+            'liquidity_ratio': liquidity,
+            'Category': pd.Categorical.from_codes(cat_codes, categories=CAP_LABELS, ordered=True)
+        })
 
     except Exception as e:
         st.warning(f"API Error ({e}). Using Synthetic Data for Demonstration.")
         
         # Generate Realistic Synthetic Data
-        np.random.seed(42)
-        categories = ['Large-Cap', 'Mid-Cap', 'Small-Cap']
-        
-        data = []
-        for i in range(50):
-            # Simulate characteristic differences
-            if i < 10: # Large Cap
-                mcap = np.random.randint(10e9, 100e9)
-                vol = np.random.uniform(0.01, 0.05)
-                liq = np.random.uniform(0.05, 0.2)
-            elif i < 30: # Mid Cap
-                mcap = np.random.randint(1e9, 10e9)
-                vol = np.random.uniform(0.05, 0.15)
-                liq = np.random.uniform(0.02, 0.1)
-            else: # Small Cap
-                mcap = np.random.randint(10e6, 1e9)
-                vol = np.random.uniform(0.15, 0.40)
-                liq = np.random.uniform(0.001, 0.05)
-                
-            data.append({
-                'name': f"Crypto-{i}",
-                'symbol': f"C{i}",
-                'current_price': np.random.uniform(1, 1000),
-                'market_cap': mcap,
-                'volume_24h': mcap * liq,
-                'change_7d': np.random.uniform(-20, 20),
-                'volatility': vol,
-                'liquidity_ratio': liq
-            })
-            
-        return pd.DataFrame(data)
+        # One array draw per category block (10 large / 20 mid / 20 small for
+        # n=50) replaces the old per-row loop of scalar randint/uniform calls
+        # PCG64 generator: skips the legacy global-state wrapper around MT19937
+        rng = np.random.default_rng(42)
+        n = PER_PAGE * N_PAGES
+        n_large, n_mid = n // 5, 2 * n // 5
+        n_small = n - n_large - n_mid
+
+        mcap = np.concatenate([
+            rng.integers(int(10e9), int(100e9), n_large),
+            rng.integers(int(1e9), int(10e9), n_mid),
+            rng.integers(int(10e6), int(1e9), n_small)
+        ])
+        vol = np.concatenate([
+            rng.uniform(0.01, 0.05, n_large),
+            rng.uniform(0.05, 0.15, n_mid),
+            rng.uniform(0.15, 0.40, n_small)
+        ])
+        liq = np.concatenate([
+            rng.uniform(0.05, 0.2, n_large),
+            rng.uniform(0.02, 0.1, n_mid),
+            rng.uniform(0.001, 0.05, n_small)
+        ])
+
+        # Match the dtypes of the API path (float32 metrics, int64 caps/volumes)
+        return pd.DataFrame({
+            'name': [f"Crypto-{i}" for i in range(n)],
+            'symbol': [f"C{i}" for i in range(n)],
+            'current_price': rng.uniform(1, 1000, n).astype(np.float32),
+            'market_cap': mcap.astype(np.int64),
+            'volume_24h': (mcap * liq).astype(np.int64),
+            'change_7d': rng.uniform(-20, 20, n).astype(np.float32),
+            'volatility': vol.astype(np.float32),
+            'liquidity_ratio': liq.astype(np.float32)
+        })
 
 # Load Data
 df = fetch_crypto_data()
 
 # --- 2. Classification Module ---
-def classify_market_cap(mcap):
-    if mcap >= 10e9: # > 10 Billion
-        return 'Large-Cap'
-    elif mcap >= 1e9: # 1 Billion to 10 Billion
-        return 'Mid-Cap'
-    else:
-        return 'Small-Cap'
+# The API path classifies inside the fused kernel; the synthetic fallback is
+# bucketized here in one vectorized pass. Categorical dtype keeps the column
+# compact (int8 codes) for the filters below.
+if 'Category' not in df.columns:
+    df['Category'] = pd.Categorical.from_codes(
+        np.searchsorted(CAP_BINS, df['market_cap'].values, side='right'),
+        categories=CAP_LABELS, ordered=True)
+
+# Precompute the scatter's log-axis transform once at load time; reruns reuse
+# it instead of recomputing per render
+df['log_liquidity'] = np.log10(df['liquidity_ratio'].to_numpy(np.float64),
+                               out=np.full(len(df), np.nan),
+                               where=df['liquidity_ratio'].values > 0)
+
+# --- 3. Cached Aggregates ---
+@st.cache_data
+def compute_aggregates(df):
+    """
+    Precomputes the reductions reused across tabs. Streamlit reruns the whole
+    script on every widget interaction, so caching these makes slider moves
+    cheap lookups instead of repeated pandas scans.
+    """
+    # One BLAS-backed corrcoef over a contiguous array beats pandas' pairwise path
+    corr_cols = ['market_cap', 'volatility', 'liquidity_ratio', 'change_7d']
+    X = df[corr_cols].to_numpy(dtype=np.float32)
+    corr = pd.DataFrame(np.corrcoef(X, rowvar=False), index=corr_cols, columns=corr_cols)
+    return {
+        'vol_large': df[df['Category'] == 'Large-Cap']['volatility'].mean(),
+        'vol_small': df[df['Category'] == 'Small-Cap']['volatility'].mean(),
+        'mcap_sum': df['market_cap'].sum(),
+        'corr': corr,
+        'pie_counts': df['Category'].value_counts().rename_axis('Category').reset_index(name='n'),
+        'vol_order': np.argsort(df['volatility'].values),
+        'sorted_vol': np.sort(df['volatility'].values)
+    }
+
+agg = compute_aggregates(df)
 
-df['Category'] = df['market_cap'].apply(classify_market_cap)
+# --- 4. Cached Figure Builders ---
+# Rebuilding the Plotly figures walks the DataFrame and regenerates the full
+# JSON spec on every rerun. Caching the Figure objects means interactions that
+# do not change the data (e.g. the risk slider) skip that work entirely. The
+# leading underscore excludes the frame from hashing; `sig` is a cheap
+# signature that changes whenever a fresh dataset is loaded.
+DF_SIG = (len(df), int(df['market_cap'].iloc[0]) if len(df) else 0)
+
+@st.cache_resource
+def build_pie_fig(_counts, sig):
+    # Presummed category counts: the payload is k=3 rows instead of all N coins
+    fig = px.pie(_counts, names='Category', values='n', title='Market Cap Classification',
+                 color='Category',
+                 color_discrete_map={'Large-Cap':'royalblue', 'Mid-Cap':'cyan', 'Small-Cap':'lightcyan'})
+    # Make chart immersive
+    fig.update_layout(autosize=True, margin=dict(t=30, b=0, l=0, r=0))
+    return fig
+
+SCATTER_TOP_K = 50  # bubbles per category before downsampling kicks in
+
+@st.cache_resource
+def build_scatter_fig(_df, sig):
+    # Stratified top-K by market cap bounds the bubble count when N_PAGES is
+    # scaled up, and the WebGL trace renders one GL draw call instead of
+    # thousands of SVG circles
+    plot_df = (_df.sort_values('market_cap', ascending=False)
+                  .groupby('Category', observed=True).head(SCATTER_TOP_K))
+    fig = px.scatter(plot_df, x="log_liquidity", y="volatility",
+                     size="market_cap", color="Category",
+                     hover_name="name", hover_data={'liquidity_ratio': ':.4f', 'log_liquidity': False},
+                     render_mode='webgl',
+                     title="Risk Map: Volatility vs Liquidity",
+                     labels={"log_liquidity": "Liquidity Ratio (Log Scale)", "volatility": "Volatility Index"},
+                     color_discrete_map={'Large-Cap':'#00CC96', 'Mid-Cap':'#EF553B', 'Small-Cap':'#636EFA'})
+    fig.update_layout(margin=dict(l=20, r=20, t=40, b=20), height=500)
+    return fig
+
+@st.cache_resource
+def build_corr_fig(_corr, sig):
+    # Rasterize the heatmap: mapping [-1, 1] through RdBu_r to an RGB image
+    # ships one base64 PNG instead of per-cell SVG rects, so the cost stays
+    # flat if the feature set ever grows beyond 4 columns
+    colors = sample_colorscale('RdBu_r', ((_corr.values.ravel() + 1) / 2).tolist(),
+                               colortype='tuple')
+    rgb = (np.array(colors).reshape(_corr.shape + (3,)) * 255).astype(np.uint8)
+    fig = px.imshow(rgb, binary_string=True, aspect="auto",
+                    title="Correlation Matrix of Market Features")
+    n = len(_corr)
+    fig.update_xaxes(tickvals=list(range(n)), ticktext=list(_corr.columns))
+    fig.update_yaxes(tickvals=list(range(n)), ticktext=list(_corr.index))
+    # Keep the text_auto semantics of the old px.imshow call
+    for i in range(n):
+        for j in range(n):
+            fig.add_annotation(x=j, y=i, text=f"{_corr.iat[i, j]:.2f}", showarrow=False)
+    fig.update_layout(margin=dict(l=20, r=20, t=40, b=20), height=500)
+    return fig
 
 # --- Navigation and Layout ---
 tab1, tab2, tab3 = st.tabs(["Dashboard", "Market Data", "Risk Analysis"])
@@ -114,29 +339,25 @@ with tab1:
     st.subheader("Market Overview")
     col1, col2, col3 = st.columns(3)
     
-    avg_vol_large = df[df['Category'] == 'Large-Cap']['volatility'].mean()
-    avg_vol_small = df[df['Category'] == 'Small-Cap']['volatility'].mean()
-    
-    col1.metric("Large-Cap Volatility", f"{avg_vol_large:.2%}", "Stable", delta_color="normal")
-    col2.metric("Small-Cap Volatility", f"{avg_vol_small:.2%}", "High Risk", delta_color="inverse")
-    col3.metric("Total Market Cap", f"${df['market_cap'].sum()/1e9:.2f} B")
+    col1.metric("Large-Cap Volatility", f"{agg['vol_large']:.2%}", "Stable", delta_color="normal")
+    col2.metric("Small-Cap Volatility", f"{agg['vol_small']:.2%}", "High Risk", delta_color="inverse")
+    col3.metric("Total Market Cap", f"${agg['mcap_sum']/1e9:.2f} B")
 
     st.subheader("Classification Distribution")
     
-    fig = px.pie(df, names='Category', title='Market Cap Classification', 
-                 color='Category', 
-                 color_discrete_map={'Large-Cap':'royalblue', 'Mid-Cap':'cyan', 'Small-Cap':'lightcyan'})
-    # Make chart immersive
-    fig.update_layout(autosize=True, margin=dict(t=30, b=0, l=0, r=0))
+    fig = build_pie_fig(agg['pie_counts'], DF_SIG)
     st.plotly_chart(fig, use_container_width=True)
 
 with tab2:
     st.subheader("Classified Cryptocurrency Data")
-    st.dataframe(df.style.format({
-        'market_cap': '${:,.0f}', 
-        'volume_24h': '${:,.0f}',
-        'volatility': '{:.2%}'
-    }))
+    # Plain st.dataframe keeps the Arrow fast path; a pandas Styler would
+    # serialize the whole table to HTML on the Python side instead
+    st.dataframe(df, column_config={
+        'market_cap': st.column_config.NumberColumn(format="dollar"),
+        'volume_24h': st.column_config.NumberColumn(format="dollar"),
+        'volatility': st.column_config.NumberColumn(format="percent"),
+        'log_liquidity': None  # internal helper column, keep it out of the table
+    })
 
 with tab3:
     st.subheader("Advanced Risk Analytics")
@@ -157,13 +378,7 @@ with tab3:
         **Conclusion:** You should observe a general trend where larger bubbles (Large-Cap) are clustered towards the bottom-right (Stable & Liquid), while smaller bubbles (Small-Cap) are scattered towards the top-left (Volatile & Illiquid). This confirms the hypothesis that market cap is inversely correlated with risk.
         """)
         
-        fig2 = px.scatter(df, x="liquidity_ratio", y="volatility", 
-                          size="market_cap", color="Category", 
-                          hover_name="name", log_x=True,
-                          title="Risk Map: Volatility vs Liquidity",
-                          labels={"liquidity_ratio": "Liquidity Ratio (Log Scale)", "volatility": "Volatility Index"},
-                          color_discrete_map={'Large-Cap':'#00CC96', 'Mid-Cap':'#EF553B', 'Small-Cap':'#636EFA'})
-        fig2.update_layout(margin=dict(l=20, r=20, t=40, b=20), height=500)
+        fig2 = build_scatter_fig(df, DF_SIG)
         st.plotly_chart(fig2, use_container_width=True)
         
     with analysis_tab2:
@@ -179,16 +394,16 @@ with tab3:
         **Conclusion:** A negative correlation between `market_cap` and `volatility` proves that as the size of the asset grows, its price stability generally improves. This is a key finding for building safer investment portfolios.
         """)
         
-        corr = df[['market_cap', 'volatility', 'liquidity_ratio', 'change_7d']].corr()
-        fig3 = px.imshow(corr, text_auto=True, aspect="auto", color_continuous_scale='RdBu_r', 
-                         title="Correlation Matrix of Market Features")
-        fig3.update_layout(margin=dict(l=20, r=20, t=40, b=20), height=500)
+        fig3 = build_corr_fig(agg['corr'], DF_SIG)
         st.plotly_chart(fig3, use_container_width=True)
 
 # --- Outcomes Logic ---
 st.sidebar.markdown("### Risk Detection Model")
 risk_threshold = st.sidebar.slider("Volatility Risk Threshold", 0.0, 0.5, 0.1)
-high_risk_coins = df[df['volatility'] > risk_threshold]
-st.sidebar.warning(f"{len(high_risk_coins)} Coins identified as High Risk base on current threshold.")
+# Binary search on the cached sorted volatilities instead of re-scanning the column
+high_risk_count = len(df) - np.searchsorted(agg['sorted_vol'], risk_threshold, side='right')
+st.sidebar.warning(f"{high_risk_count} Coins identified as High Risk base on current threshold.")
 if st.sidebar.checkbox("Show High Risk Assets"):
-    st.sidebar.table(high_risk_coins[['symbol', 'Category', 'volatility']])
+    # Slice the presorted index instead of building a boolean-mask DataFrame
+    high_risk_idx = agg['vol_order'][len(df) - high_risk_count:]
+    st.sidebar.table(df.iloc[high_risk_idx][['symbol', 'Category', 'volatility']])